@@ -1,7 +1,17 @@
 from celery import Celery
+from kombu.serialization import register
 from app.config import settings
+import orjson
 import ssl
 
+register(
+    "orjson",
+    orjson.dumps,
+    orjson.loads,
+    content_type="application/x-orjson",
+    content_encoding="binary",
+)
+
 ssl_options = {}
 if settings.REDIS_URL.startswith("rediss://"):
     ssl_options = {"ssl_cert_reqs": ssl.CERT_REQUIRED}
@@ -12,4 +22,16 @@ celery_app.conf.update(
     broker_use_ssl=ssl_options,
     redis_backend_use_ssl=ssl_options,
     broker_connection_retry_on_startup=True,
+    task_serializer="orjson",
+    result_serializer="orjson",
+    accept_content=["json", "orjson"],
+    broker_pool_limit=settings.CELERY_REDIS_MAX_CONNECTIONS,
+    broker_transport_options={
+        "max_connections": settings.CELERY_REDIS_MAX_CONNECTIONS,
+        "socket_keepalive": True,
+    },
+    redis_socket_keepalive=True,
+    # Forked children inherit the imported app, recycle them only occasionally
+    worker_pool="prefork",
+    worker_max_tasks_per_child=settings.CELERY_MAX_TASKS_PER_CHILD,
 )
@@ -1,16 +1,64 @@
 import os
+from dataclasses import dataclass, field
+from typing import Any, Callable
 from dotenv import load_dotenv
 
-load_dotenv()
+APP_ENV = os.getenv("APP_ENV", "dev")
 
+# Containers get their environment injected, so .env is only parsed in development
+if APP_ENV == "dev":
+    load_dotenv()
 
+
+def _env(
+    key: str,
+    default: Any = None,
+    cast: Callable[[str], Any] = str,
+    secret: bool = False,
+) -> Any:
+    """
+    Declare a setting read from the environment once, when Settings is built.
+    """
+
+    def factory():
+        value = os.environ.get(key)
+        return default if value is None else cast(value)
+
+    return field(default_factory=factory, repr=not secret)
+
+
+@dataclass(frozen=True, slots=True)
 class Settings:
-    OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-    OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
-    REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379")
-    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
-    RATE_LIMIT_WINDOW = int(os.getenv("RATE_LIMIT_WINDOW", 86400))
-    RATE_LIMIT_REQUESTS = int(os.getenv("RATE_LIMIT_REQUESTS", 8))
+    OPENAI_API_KEY: str | None = _env("OPENAI_API_KEY", secret=True)
+    OPENAI_MODEL: str = _env("OPENAI_MODEL", "gpt-4o-mini")
+    REDIS_URL: str = _env("REDIS_URL", "redis://localhost:6379")
+    REDIS_MAX_CONNECTIONS: int = _env("REDIS_MAX_CONNECTIONS", 32, int)
+    CELERY_REDIS_MAX_CONNECTIONS: int = _env("CELERY_REDIS_MAX_CONNECTIONS", 10, int)
+    CELERY_MAX_TASKS_PER_CHILD: int = _env("CELERY_MAX_TASKS_PER_CHILD", 100, int)
+    LOG_LEVEL: str = _env("LOG_LEVEL", "INFO")
+    RATE_LIMIT_WINDOW: int = _env("RATE_LIMIT_WINDOW", 86400, int)
+    RATE_LIMIT_REQUESTS: int = _env("RATE_LIMIT_REQUESTS", 8, int)
+    TASK_META_CACHE_TTL: int = _env("TASK_META_CACHE_TTL", 60, int)
+    TASK_META_CACHE_SIZE: int = _env("TASK_META_CACHE_SIZE", 1000, int)
+    GITHUB_CACHE_TTL: int = _env("GITHUB_CACHE_TTL", 86400, int)
+    LLM_CACHE_TTL: int = _env("LLM_CACHE_TTL", 7 * 86400, int)
+    MAX_PATCH_CHARS: int = _env("MAX_PATCH_CHARS", 65536, int)
+    LLM_INITIAL_CONCURRENCY: int = _env("LLM_INITIAL_CONCURRENCY", 8, int)
+    LLM_MAX_CONCURRENCY: int = _env("LLM_MAX_CONCURRENCY", 32, int)
+    LLM_CONCURRENCY_INCREASE_INTERVAL: int = _env(
+        "LLM_CONCURRENCY_INCREASE_INTERVAL", 30, int
+    )
+    LLM_RETRY_ATTEMPTS: int = _env("LLM_RETRY_ATTEMPTS", 4, int)
+    LLM_RETRY_MAX_WAIT: int = _env("LLM_RETRY_MAX_WAIT", 30, int)
+    LLM_PACK_MAX_CHARS: int = _env("LLM_PACK_MAX_CHARS", 8000, int)
+    LLM_PACK_MAX_FILES: int = _env("LLM_PACK_MAX_FILES", 8, int)
+    LLM_QUEUE_SIZE: int = _env("LLM_QUEUE_SIZE", 32, int)
+    LLM_MAX_CONNECTIONS: int = _env("LLM_MAX_CONNECTIONS", 64, int)
+    LLM_MAX_KEEPALIVE_CONNECTIONS: int = _env("LLM_MAX_KEEPALIVE_CONNECTIONS", 32, int)
+    BATCH_API_MIN_FILES: int = _env("BATCH_API_MIN_FILES", 100, int)
+    BATCH_API_POLL_INTERVAL: int = _env("BATCH_API_POLL_INTERVAL", 5, int)
+    BATCH_API_MAX_POLL_INTERVAL: int = _env("BATCH_API_MAX_POLL_INTERVAL", 300, int)
+    BATCH_API_MAX_WAIT: int = _env("BATCH_API_MAX_WAIT", 6 * 3600, int)
 
 
 settings = Settings()
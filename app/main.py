@@ -1,10 +1,15 @@
 from fastapi import FastAPI, HTTPException, status
+from fastapi.responses import ORJSONResponse
+import time
+import asyncio
 import logging
+from collections import OrderedDict
+from celery import states
 from app.schemas import PRAnalysisRequest, TaskStatusResponse, AnalysisResultResponse
 from app.tasks import analyze_code_task
-from celery.result import AsyncResult
+from app.celery_conf import celery_app
 from app.config import settings
-import redis
+from app.redis_conf import redis_client
 from fastapi_redis_rate_limiter import (
     RedisRateLimiterMiddleware,
     RedisClient as RateLimitClient,
@@ -16,9 +21,9 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-app = FastAPI(title="PR Agent API")
+app = FastAPI(title="PR Agent API", default_response_class=ORJSONResponse)
 
-rate_limit_client = RateLimitClient(redis.from_url(settings.REDIS_URL))
+rate_limit_client = RateLimitClient(redis_client)
 app.add_middleware(
     RedisRateLimiterMiddleware,
     redis_client=rate_limit_client,
@@ -26,6 +31,30 @@ app.add_middleware(
     window=settings.RATE_LIMIT_WINDOW,
 )
 
+# Finished tasks never change state, so their meta is kept in-process for a while
+# to serve repeated polling without a Redis round-trip
+_task_meta_cache: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+
+
+async def _get_task_meta(task_id: str) -> dict:
+    """Fetch a task's state from the result backend without blocking the event loop."""
+    cached = _task_meta_cache.get(task_id)
+    if cached and cached[0] > time.monotonic():
+        return cached[1]
+
+    meta = await asyncio.to_thread(celery_app.backend.get_task_meta, task_id)
+    if meta["status"] in states.READY_STATES:
+        now = time.monotonic()
+        # Entries share one TTL, so insertion order is expiry order
+        while _task_meta_cache and next(iter(_task_meta_cache.values()))[0] <= now:
+            _task_meta_cache.popitem(last=False)
+
+        _task_meta_cache[task_id] = (now + settings.TASK_META_CACHE_TTL, meta)
+        _task_meta_cache.move_to_end(task_id)
+        if len(_task_meta_cache) > settings.TASK_META_CACHE_SIZE:
+            _task_meta_cache.popitem(last=False)
+    return meta
+
 
 @app.post(
     "/analyze-pr",
@@ -66,11 +95,11 @@ async def analyze_pr(request: PRAnalysisRequest):
 async def get_task_status(task_id: str):
     """Get the status of an analysis task."""
     try:
-        task = AsyncResult(task_id)
+        meta = await _get_task_meta(task_id)
 
         return {
-            "task_id": task.id,
-            "status": task.status,
+            "task_id": task_id,
+            "status": meta["status"],
         }
     except Exception as e:
         logger.error(f"Error getting task status: {str(e)}")
@@ -88,17 +117,18 @@ async def get_task_status(task_id: str):
 async def get_results(task_id: str):
     """Get the results of an analysis task."""
     try:
-        task = AsyncResult(task_id)
-        if task.status == "SUCCESS":
+        meta = await _get_task_meta(task_id)
+        # PROGRESS carries the file or batch progress reported by the running task
+        if meta["status"] in (states.SUCCESS, "PROGRESS"):
             return {
-                "task_id": task.id,
-                "status": task.status,
-                "results": task.result,
+                "task_id": task_id,
+                "status": meta["status"],
+                "results": meta["result"],
             }
 
         return {
-            "task_id": task.id,
-            "status": task.status,
+            "task_id": task_id,
+            "status": meta["status"],
             "results": {},
         }
     except Exception as e:
@@ -0,0 +1,8 @@
+import redis
+from app.config import settings
+
+# Shared by the rate limiter and the caches so connection counts stay bounded
+redis_pool = redis.ConnectionPool.from_url(
+    settings.REDIS_URL, max_connections=settings.REDIS_MAX_CONNECTIONS
+)
+redis_client = redis.Redis(connection_pool=redis_pool)
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, Field
-from typing import Any, List
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Any, Dict, List
 from enum import Enum
 
 
@@ -37,6 +37,8 @@ class IssueSeverityEnums(str, Enum):
 
 
 class Issue(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     type: IssueTypeEnums = Field(
         description="Type of issue found, choose from style, bug, performance, best_practice"
     )
@@ -50,3 +52,14 @@ class Issue(BaseModel):
 
 class LLMResponseSchema(BaseModel):
     issues: List[Issue] = Field(description="List of code analysis issues")
+
+
+class LLMMultiFileResponseSchema(BaseModel):
+    files: Dict[str, LLMResponseSchema] = Field(
+        description="Code analysis for each file, keyed by the file path"
+    )
+
+
+# Analysis result for a single PR file
+class FileAnalysis(LLMResponseSchema):
+    filename: str
@@ -1,106 +1,799 @@
+import os
+import re
+import asyncio
+import orjson
+import time
 import logging
-from typing import Optional
+import functools
+import contextlib
+import httpx
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    Type,
+)
+from tenacity import (
+    AsyncRetrying,
+    retry_if_exception_type,
+    stop_after_attempt,
+    wait_random_exponential,
+)
+from openai import InternalServerError, OpenAI, RateLimitError
+from openai.types import Batch
 from langchain_openai import ChatOpenAI
 from langchain.prompts import ChatPromptTemplate
+from langchain_core.messages import BaseMessage
+from langchain_core.runnables import Runnable, RunnableLambda
+from pydantic import BaseModel
 from app.config import settings
-from app.schemas import LLMResponseSchema
+from app.schemas import FileAnalysis, LLMMultiFileResponseSchema, LLMResponseSchema
+from app.services.llm_cache import LLMResultCache
+
+_EXTENSION_MAP = {
+    ".py": "Python",
+    ".js": "JavaScript",
+    ".ts": "TypeScript",
+    ".go": "Go",
+    ".html": "HTML",
+    ".css": "CSS",
+    ".tsx": "TypeScript React",
+    ".jsx": "JavaScript React",
+}
+
+# Vendored, built, minified, generated and lock files carry no reviewable changes
+_SKIP_PATH_RE = re.compile(
+    r"""
+    (^|/)(node_modules|dist|build|vendor|migrations)/
+    | \.min\.
+    | \.generated\.
+    | (_pb2(_grpc)?\.py|\.pb\.go|\.d\.ts)$
+    | (^|/)(package-lock\.json|yarn\.lock)$
+    """,
+    re.VERBOSE,
+)
+
+
+@functools.lru_cache(maxsize=4096)
+def _is_reviewable_path(file_name: str) -> bool:
+    """
+    Check whether a path has a known language and is not vendored or generated.
+    """
+    ext = os.path.splitext(file_name)[1].lower()
+    return ext in _EXTENSION_MAP and not _SKIP_PATH_RE.search(file_name)
+
+
+@functools.lru_cache(maxsize=8)
+def _get_llm(model: str, api_key: Optional[str], temperature: float) -> ChatOpenAI:
+    """
+    Build the chat model once per configuration for the whole process.
+
+    Its pooled HTTPS connections are then kept alive across files and tasks.
+    """
+    limits = httpx.Limits(
+        max_connections=settings.LLM_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.LLM_MAX_KEEPALIVE_CONNECTIONS,
+    )
+    return ChatOpenAI(
+        model=model,
+        temperature=temperature,
+        api_key=api_key,  # type: ignore
+        http_client=httpx.Client(limits=limits),
+        http_async_client=httpx.AsyncClient(limits=limits),
+    )
+
+
+@functools.lru_cache(maxsize=8)
+def _get_structured_llm(
+    model: str,
+    api_key: Optional[str],
+    temperature: float,
+    schema: Type[BaseModel] = LLMResponseSchema,
+) -> Runnable:
+    """
+    Build the JSON-mode runnable that returns validated responses, once per configuration.
+
+    This is the request with_structured_output(method="json_mode") makes, but the
+    JSON is parsed and validated in a single pydantic-core pass rather than
+    json.loads followed by model_validate.
+    """
+
+    def parse(message: BaseMessage) -> BaseModel:
+        return schema.model_validate_json(message.content)  # type: ignore
+
+    return _get_llm(model, api_key, temperature).bind(
+        response_format={"type": "json_object"}
+    ) | RunnableLambda(parse)
+
+
+# The instructions are identical for every file and sent first, so OpenAI's
+# automatic prompt caching can reuse them; only the user message varies
+_SYSTEM_PROMPT = """You are an expert code reviewer for GitHub pull requests, here + denotes added lines and - denotes removed lines. Analyze the code you are given for:
+1. Code style and formatting issues
+2. Potential bugs or errors
+3. Performance improvements
+4. Best practices violations
+
+Provide a detailed analysis in the following JSON format in very brief:
+{{
+    "issues": [
+        {{
+            "type": "style|bug|performance|best_practice",
+            "line": <line_number>,
+            "description": "Detailed description of the issue",
+            "suggestion": "Specific suggestion for improvement",
+            "severity": "critical|high|medium|low"
+        }}
+    ]
+}}
+"""
+
+_USER_PROMPT = """Language: {language}
+
+Status of the file: {file_status}
+
+Code to analyze:
+```
+{file_content}
+```
+"""
+
+_ANALYSIS_PROMPT = ChatPromptTemplate.from_messages(
+    [("system", _SYSTEM_PROMPT), ("human", _USER_PROMPT)]
+)
+
+# Small files are packed into one request to share the instructions and the
+# round-trip; each file is a section of the user message
+_MULTI_FILE_SYSTEM_PROMPT = """You are an expert code reviewer for GitHub pull requests, here + denotes added lines and - denotes removed lines. You are given several files from the same pull request. Analyze the code of each file for:
+1. Code style and formatting issues
+2. Potential bugs or errors
+3. Performance improvements
+4. Best practices violations
+
+Provide a detailed analysis of every file in the following JSON format in very brief, keyed by the file path:
+{{
+    "files": {{
+        "<file_path>": {{
+            "issues": [
+                {{
+                    "type": "style|bug|performance|best_practice",
+                    "line": <line_number>,
+                    "description": "Detailed description of the issue",
+                    "suggestion": "Specific suggestion for improvement",
+                    "severity": "critical|high|medium|low"
+                }}
+            ]
+        }}
+    }}
+}}
+"""
+
+_FILE_SECTION = """File: {file_name}
+
+Language: {language}
+
+Status of the file: {file_status}
+
+Code to analyze:
+```
+{file_content}
+```
+"""
+
+_MULTI_FILE_PROMPT = ChatPromptTemplate.from_messages(
+    [("system", _MULTI_FILE_SYSTEM_PROMPT), ("human", "{file_sections}")]
+)
+
+
+async def _gather_or_cancel(*aws: Awaitable) -> list:
+    """
+    Run awaitables concurrently like asyncio.gather, cancelling the rest if one fails.
+
+    Workers keep one event loop across tasks, so anything left running after a
+    failure would otherwise resume during the next task.
+    """
+    tasks = [asyncio.ensure_future(aw) for aw in aws]
+    try:
+        return await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+class AIMDController:
+    """Adaptive limit on concurrent LLM calls (additive increase, multiplicative decrease)."""
+
+    def __init__(self, initial: int, maximum: int, increase_interval: float):
+        self.logger = logging.getLogger(__name__)
+        self.limit = initial
+        self.maximum = maximum
+        self.increase_interval = increase_interval
+        self._last_change = time.monotonic()
+        self._last_decrease = float("-inf")
+        self._active = 0
+        self._condition: Optional[asyncio.Condition] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def on_success(self):
+        """
+        Raise the limit by one after a full interval without overload.
+        """
+        now = time.monotonic()
+        if (
+            self.limit < self.maximum
+            and now - self._last_change >= self.increase_interval
+        ):
+            self.limit += 1
+            self._last_change = now
+
+    def on_overload(self):
+        """
+        Halve the limit when the API reports rate limiting or server errors.
+        """
+        now = time.monotonic()
+        # A burst of in-flight failures should only back off once
+        if now - self._last_decrease < 1:
+            return
+        self.limit = max(1, self.limit // 2)
+        self._last_change = self._last_decrease = now
+        self.logger.warning(f"LLM overloaded, reducing concurrency to {self.limit}")
+
+    @contextlib.asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """
+        Hold one of the currently allowed concurrent LLM call slots.
+        """
+        # The limit is shared by the process, but asyncio primitives belong to
+        # the event loop of the task currently running
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._condition is None:
+            self._loop = loop
+            self._condition = asyncio.Condition()
+            self._active = 0
+
+        condition = self._condition
+        async with condition:
+            await condition.wait_for(lambda: self._active < self.limit)
+            self._active += 1
+        try:
+            yield
+        finally:
+            async with condition:
+                self._active -= 1
+                condition.notify_all()
 
 
 class AICodeAnalysisService:
     """Service for performing code analysis using LLM."""
 
-    def __init__(self, model: Optional[str] = None, api_key: Optional[str] = None):
+    # Shared by every service in the process so what is learned about the
+    # account's rate limit carries over between tasks
+    concurrency = AIMDController(
+        settings.LLM_INITIAL_CONCURRENCY,
+        settings.LLM_MAX_CONCURRENCY,
+        settings.LLM_CONCURRENCY_INCREASE_INTERVAL,
+    )
+
+    def __init__(
+        self,
+        model: Optional[str] = None,
+        api_key: Optional[str] = None,
+        cache: Optional[LLMResultCache] = None,
+    ):
         """
         Initialize LLM service with optional model specification.
         """
         self.logger = logging.getLogger(__name__)
+        self.cache = cache
         self.model = model or settings.OPENAI_MODEL
         self.api_key = api_key or settings.OPENAI_API_KEY
-        self.llm = ChatOpenAI(
-            model=self.model,
-            temperature=0.1,
-            api_key=self.api_key,  # type: ignore
+        # Deterministic output is what makes cached results safe to reuse
+        self.temperature = 0.0
+        self.llm = _get_llm(self.model, self.api_key, self.temperature)
+        self._structured_llm = _get_structured_llm(
+            self.model, self.api_key, self.temperature
+        )
+        self._multi_file_llm = _get_structured_llm(
+            self.model, self.api_key, self.temperature, LLMMultiFileResponseSchema
         )
 
-    def _detect_language(self, file_name: str) -> str:
+    @staticmethod
+    @functools.lru_cache(maxsize=4096)
+    def _detect_language(file_name: str) -> str:
         """
         Detect programming language based on file extension.
         """
-        extension_map = {
-            ".py": "Python",
-            ".js": "JavaScript",
-            ".ts": "TypeScript",
-            ".go": "Go",
-            ".html": "HTML",
-            ".css": "CSS",
-            ".tsx": "TypeScript React",
-            ".jsx": "JavaScript React",
-        }
-        ext = "." + file_name.split(".")[-1].lower()
-        return extension_map.get(ext, "Unknown")
+        ext = os.path.splitext(file_name)[1].lower()
+        return _EXTENSION_MAP.get(ext, "Unknown")
 
-    def _get_prompt(self, file_content: str, language: str, file_status: str) -> list:
+    def _should_analyze(self, pr_file: dict) -> bool:
         """
-        Generate prompt for code analysis.
+        Check whether a PR file is worth sending to the LLM.
         """
-        ANALYSIS_PROMPT = """You are an expert code reviewer for GitHub pull requests, here + denotes added lines and - denotes removed lines. Analyze the following code for:
-        1. Code style and formatting issues
-        2. Potential bugs or errors
-        3. Performance improvements
-        4. Best practices violations
+        return bool(pr_file["content"]) and _is_reviewable_path(pr_file["name"])
 
-        Language: {language}
+    def _trim_patch(self, patch: str) -> str:
+        """
+        Cut an oversized patch down to the whole hunks that fit in MAX_PATCH_CHARS.
+        """
+        limit = settings.MAX_PATCH_CHARS
+        if len(patch) <= limit:
+            return patch
 
-        Status of the file: {file_status}
+        # Cut just before the last hunk header inside the limit, or mid-hunk
+        # when even the first hunk is too large
+        cut = patch.rfind("\n@@ ", 0, limit)
+        return patch[: cut + 1] if cut > 0 else patch[:limit]
 
-        Code to analyze:
-        ```
-        {file_content}
-        ```
+    def _prepare_file(self, pr_file: dict) -> Optional[dict]:
+        """
+        Return the file with its patch trimmed, or None if it should not be analyzed.
+        """
+        if not self._should_analyze(pr_file):
+            self.logger.info(f"Skipping analysis for file: {pr_file['name']}")
+            return None
+        return {**pr_file, "content": self._trim_patch(pr_file["content"])}
 
-        Provide a detailed analysis in the following JSON format in very brief:
-        {{
-            "issues": [
-                {{
-                    "type": "style|bug|performance|best_practice",
-                    "line": <line_number>,
-                    "description": "Detailed description of the issue",
-                    "suggestion": "Specific suggestion for improvement",
-                    "severity": "critical|high|medium|low"
-                }}
-            ]
-        }}
+    def _prepare_files(self, files: List[dict]) -> List[dict]:
+        """
+        Drop files that should not be analyzed and trim the patches of the rest.
         """
+        prepared = (self._prepare_file(pr_file) for pr_file in files)
+        return [pr_file for pr_file in prepared if pr_file is not None]
 
-        prompt = ChatPromptTemplate.from_template(ANALYSIS_PROMPT)
-        return prompt.format_messages(
+    def _get_prompt(self, file_content: str, language: str, file_status: str) -> list:
+        """
+        Generate prompt for code analysis.
+        """
+        return _ANALYSIS_PROMPT.format_messages(
             file_content=file_content,
             language=language,
             file_status=file_status,
         )
 
-    def analyze_file(self, file_content: str, file_name: str, file_status: str) -> dict:
+    def _get_multi_file_prompt(self, files: List[dict]) -> list:
         """
-        Analyze a single file using AI.
+        Generate a single prompt analyzing several files.
         """
-        self.logger.info(f"Starting analysis for file: {file_name}")
+        file_sections = "\n".join(
+            _FILE_SECTION.format(
+                file_name=pr_file["name"],
+                language=self._detect_language(pr_file["name"]),
+                file_status=pr_file["status"],
+                file_content=pr_file["content"],
+            )
+            for pr_file in files
+        )
+        return _MULTI_FILE_PROMPT.format_messages(file_sections=file_sections)
 
-        # Detect programming language
-        language = self._detect_language(file_name)
-        # Create prompts
-        prompt = self._get_prompt(file_content, language, file_status)
+    def _to_result(self, file_name: str, response: Any) -> FileAnalysis:
+        """
+        Convert a raw LLM response (or the exception it raised) into a file result.
+        """
+        if isinstance(response, Exception):
+            self.logger.error(f"Error getting response from LLM: {response}")
+            return FileAnalysis(issues=[], filename=file_name)
+
+        # The issues were validated when the response was parsed
+        return FileAnalysis.model_construct(issues=response.issues, filename=file_name)
+
+    def _cache_key(self, pr_file: dict) -> str:
+        """
+        Build the cache key for a file from everything that affects its analysis.
+        """
+        return LLMResultCache.make_key(
+            self.model,
+            str(self.temperature),
+            self._detect_language(pr_file["name"]),
+            pr_file["status"],
+            pr_file["content"],
+        )
+
+    async def _lookup_cache(
+        self, files: List[dict]
+    ) -> Tuple[List[str], List[Optional[FileAnalysis]]]:
+        """
+        Look up cached results for the files, returning their keys and hits (or None).
+        """
+        keys = [self._cache_key(pr_file) for pr_file in files]
+        if self.cache is None:
+            return keys, [None] * len(keys)
+
+        # Redis calls block, so they run in a thread like the GitHub pagination
+        cached_values = await asyncio.to_thread(self.cache.get_many, keys)
+
+        results: List[Optional[FileAnalysis]] = [
+            (
+                self._to_result(
+                    pr_file["name"], LLMResponseSchema.model_validate_json(cached)
+                )
+                if cached
+                else None
+            )
+            for pr_file, cached in zip(files, cached_values)
+        ]
+        return keys, results
+
+    async def _store_result(
+        self, key: str, file_name: str, response: Any
+    ) -> FileAnalysis:
+        """
+        Convert an LLM response into a file result, caching it when successful.
+        """
+        if self.cache is not None and not isinstance(response, Exception):
+            await asyncio.to_thread(self.cache.set, key, response.model_dump_json())
+        return self._to_result(file_name, response)
+
+    async def _request_analysis(self, key: str, pr_file: dict) -> FileAnalysis:
+        """
+        Analyze a single uncached file using AI without blocking the event loop.
+        """
+        self.logger.info(f"Starting analysis for file: {pr_file['name']}")
+        language = self._detect_language(pr_file["name"])
+        prompt = self._get_prompt(pr_file["content"], language, pr_file["status"])
 
-        response = {}
         try:
-            llm = self.llm.with_structured_output(LLMResponseSchema, method="json_mode")
-            response = llm.invoke(prompt)
-            if isinstance(response, LLMResponseSchema):
-                response = response.model_dump()
+            response = await self._ainvoke_with_retry(self._structured_llm, prompt)
         except Exception as e:
-            self.logger.error(f"Error getting response from LLM: {e}")
-            response = {"issues": []}
+            response = e
+
+        self.logger.info(f"Completed analysis for file: {pr_file['name']}")
+        return await self._store_result(key, pr_file["name"], response)
+
+    async def _analyze_pack(self, files: List[dict]) -> List[FileAnalysis]:
+        """
+        Analyze prepared files, sending the uncached ones in a single LLM request.
+
+        Files the combined response does not cover, or all of them when it cannot
+        be parsed, are analyzed on their own. If the API stays overloaded the
+        files get empty results instead.
+        """
+        keys, results = await self._lookup_cache(files)
+        pending = [index for index, result in enumerate(results) if result is None]
+
+        if len(pending) > 1:
+            names = [files[index]["name"] for index in pending]
+            self.logger.info(f"Starting packed analysis for files: {names}")
+            prompt = self._get_multi_file_prompt([files[index] for index in pending])
+            try:
+                response = await self._ainvoke_with_retry(self._multi_file_llm, prompt)
+                answered = response.files
+            except (RateLimitError, InternalServerError) as e:
+                # Retries are exhausted, resending each file on its own would
+                # only add load while the API is overloaded
+                answered = {files[index]["name"]: e for index in pending}
+            except Exception as e:
+                self.logger.error(f"Error getting packed response from LLM: {e}")
+                answered = {}
+
+            for index in pending:
+                file_name = files[index]["name"]
+                if file_name in answered:
+                    results[index] = await self._store_result(
+                        keys[index], file_name, answered[file_name]
+                    )
+            pending = [index for index in pending if results[index] is None]
+
+        unpacked = await _gather_or_cancel(
+            *(self._request_analysis(keys[index], files[index]) for index in pending)
+        )
+        for index, result in zip(pending, unpacked):
+            results[index] = result
+        return results  # type: ignore
+
+    async def _ainvoke_with_retry(self, llm: Runnable, prompt: list) -> Any:
+        """
+        Call the LLM within the adaptive concurrency limit, backing off on overload.
+        """
+        async for attempt in AsyncRetrying(
+            retry=retry_if_exception_type((RateLimitError, InternalServerError)),
+            wait=wait_random_exponential(multiplier=1, max=settings.LLM_RETRY_MAX_WAIT),
+            stop=stop_after_attempt(settings.LLM_RETRY_ATTEMPTS),
+            reraise=True,
+        ):
+            with attempt:
+                try:
+                    async with self.concurrency.slot():
+                        response = await llm.ainvoke(prompt)
+                except (RateLimitError, InternalServerError):
+                    self.concurrency.on_overload()
+                    raise
+                self.concurrency.on_success()
+                return response
+        raise AssertionError("unreachable, the last attempt re-raises")
+
+    async def analyze_files(
+        self,
+        files: Iterable[dict],
+        on_progress: Optional[Callable[[int, int, str], None]] = None,
+    ) -> List[FileAnalysis]:
+        """
+        Analyze multiple files concurrently using AI.
+
+        Files are pulled from the iterable into a bounded queue while
+        LLM_MAX_CONCURRENCY workers analyze them, so analysis starts before a
+        paginated file listing has been fully fetched. Small files are packed
+        together, up to LLM_PACK_MAX_FILES files and LLM_PACK_MAX_CHARS characters,
+        and analyzed in a single request. How many LLM calls run at once adapts
+        to rate limiting up to that ceiling. Skipped files are left out of the
+        results and a failure on one file yields an empty issue list.
+        on_progress is called in a thread with the number of files analyzed so far,
+        the number queued for analysis so far and the last one completed.
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=settings.LLM_QUEUE_SIZE)
+        results: Dict[int, FileAnalysis] = {}
+        workers = settings.LLM_MAX_CONCURRENCY
+        queued = 0
+
+        async def produce():
+            nonlocal queued
+            pack: List[Tuple[int, dict]] = []
+            pack_size = 0
+
+            # Fetching the next page of files blocks, so it runs in a thread
+            items = enumerate(files)
+            while (item := await asyncio.to_thread(next, items, None)) is not None:
+                index, pr_file = item
+                pr_file = self._prepare_file(pr_file)
+                if pr_file is None:
+                    continue
+                queued += 1
+
+                size = len(pr_file["content"])
+                if size > settings.LLM_PACK_MAX_CHARS:
+                    await queue.put([(index, pr_file)])
+                    continue
+                if pack and pack_size + size > settings.LLM_PACK_MAX_CHARS:
+                    await queue.put(pack)
+                    pack, pack_size = [], 0
+                pack.append((index, pr_file))
+                pack_size += size
+                if len(pack) >= settings.LLM_PACK_MAX_FILES:
+                    await queue.put(pack)
+                    pack, pack_size = [], 0
+
+            if pack:
+                await queue.put(pack)
+            for _ in range(workers):
+                await queue.put(None)
+
+        async def consume():
+            while (pack := await queue.get()) is not None:
+                indexes = [index for index, _ in pack]
+                packed = await self._analyze_pack([pr_file for _, pr_file in pack])
+                results.update(zip(indexes, packed))
+                if on_progress:
+                    # Reporting is best-effort and usually a blocking Redis write
+                    try:
+                        await asyncio.to_thread(
+                            on_progress, len(results), queued, pack[-1][1]["name"]
+                        )
+                    except Exception as e:
+                        self.logger.warning(f"Error reporting progress: {e}")
+
+        await _gather_or_cancel(produce(), *(consume() for _ in range(workers)))
+
+        self.logger.info(f"Completed concurrent analysis for {len(results)} files")
+        return [results[index] for index in sorted(results)]
+
+    def _batch_processor(self) -> "BatchLLMProcessor":
+        """
+        Build a Batch API client sharing the chat model's HTTP connection pool.
+        """
+        return BatchLLMProcessor(
+            self.model, self.api_key, self.temperature, http_client=self.llm.http_client
+        )
+
+    async def submit_batch(self, files: List[dict]) -> Optional[Batch]:
+        """
+        Submit the uncached files for analysis through the OpenAI Batch API.
+
+        Slower to complete than analyze_files but billed at half the token cost,
+        so it is meant for large PRs where results are not needed interactively.
+        Returns None when there is nothing to submit or submitting failed, leaving
+        every file to the direct fallback in collect_batch.
+        """
+        files = self._prepare_files(files)
+        _, results = await self._lookup_cache(files)
+        requests = {
+            pr_file["name"]: self._get_prompt(
+                pr_file["content"],
+                self._detect_language(pr_file["name"]),
+                pr_file["status"],
+            )
+            for pr_file, result in zip(files, results)
+            if result is None
+        }
+        if not requests:
+            return None
 
-        response["filename"] = file_name  # type: ignore
+        self.logger.info(f"Submitting batch analysis for {len(requests)} files")
+        try:
+            return await asyncio.to_thread(self._batch_processor().submit, requests)
+        except Exception as e:
+            self.logger.error(f"Error submitting batch analysis: {e}")
+            return None
+
+    def poll_batch(self, batch_id: str) -> Optional[Batch]:
+        """
+        Fetch the current state of a submitted batch, cancelling it if that fails.
+        """
+        processor = self._batch_processor()
+        try:
+            return processor.retrieve(batch_id)
+        except Exception as e:
+            self.logger.error(f"Error polling batch {batch_id}: {e}")
+            # Nothing would collect a batch left running, so stop it being billed
+            processor.cancel(batch_id)
+            return None
+
+    def cancel_batch(self, batch_id: str) -> Optional[Batch]:
+        """
+        Cancel a submitted batch, returning its state or None if that failed.
+        """
+        return self._batch_processor().cancel(batch_id)
+
+    async def collect_batch(
+        self, files: List[dict], batch: Optional[Batch]
+    ) -> List[FileAnalysis]:
+        """
+        Build the results for the files from a finished batch.
+
+        Files the batch did not produce a valid response for, or all uncached
+        files when there is no batch, are analyzed directly instead.
+        """
+        files = self._prepare_files(files)
+        keys, results = await self._lookup_cache(files)
+        pending = [index for index, result in enumerate(results) if result is None]
+
+        responses: Dict[str, Any] = {}
+        if batch is not None:
+            if batch.status != "completed":
+                self.logger.error(
+                    f"Batch {batch.id} finished with status: {batch.status}"
+                )
+            try:
+                responses = await asyncio.to_thread(
+                    self._batch_processor().collect, batch
+                )
+            except Exception as e:
+                self.logger.error(f"Error collecting batch {batch.id}: {e}")
+
+        # Requests the batch failed, expired or answered with invalid JSON, or all
+        # of them when the Batch API itself errored, are analyzed again through
+        # the direct path instead of coming back empty
+        unanswered = [
+            index
+            for index in pending
+            if not isinstance(responses.get(files[index]["name"]), LLMResponseSchema)
+        ]
+        fallback = {}
+        if unanswered:
+            self.logger.warning(
+                f"Falling back to direct analysis for {len(unanswered)} files"
+            )
+            fallback_results = await self.analyze_files(
+                [files[index] for index in unanswered]
+            )
+            fallback = {result.filename: result for result in fallback_results}
+
+        for index in pending:
+            file_name = files[index]["name"]
+            if file_name in fallback:
+                results[index] = fallback[file_name]
+            else:
+                results[index] = await self._store_result(
+                    keys[index], file_name, responses[file_name]
+                )
+
+        self.logger.info(f"Completed batch analysis for {len(pending)} files")
+        return results  # type: ignore
+
+
+class BatchLLMProcessor:
+    """Service for running chat completions through the OpenAI Batch API."""
+
+    MESSAGE_ROLES = {"system": "system", "human": "user", "ai": "assistant"}
+    TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+    def __init__(
+        self,
+        model: str,
+        api_key: Optional[str],
+        temperature: float,
+        http_client: Optional[httpx.Client] = None,
+    ):
+        self.logger = logging.getLogger(__name__)
+        self.model = model
+        self.temperature = temperature
+        self.client = OpenAI(api_key=api_key, http_client=http_client)
+
+    def _to_jsonl(self, requests: Dict[str, list]) -> bytes:
+        """
+        Serialize prompts keyed by custom_id into the Batch API JSONL input format.
+        """
+        lines: List[bytes] = []
+        for custom_id, messages in requests.items():
+            body = {
+                "model": self.model,
+                "temperature": self.temperature,
+                "response_format": {"type": "json_object"},
+                "messages": [
+                    {
+                        "role": self.MESSAGE_ROLES[message.type],
+                        "content": message.content,
+                    }
+                    for message in messages
+                ],
+            }
+            lines.append(
+                orjson.dumps(
+                    {
+                        "custom_id": custom_id,
+                        "method": "POST",
+                        "url": "/v1/chat/completions",
+                        "body": body,
+                    }
+                )
+            )
+        return b"\n".join(lines)
+
+    def submit(self, requests: Dict[str, list]) -> Batch:
+        """
+        Upload the requests and create a batch.
+        """
+        input_file = self.client.files.create(
+            file=("batch.jsonl", self._to_jsonl(requests)), purpose="batch"
+        )
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h",
+        )
+        self.logger.info(f"Submitted batch {batch.id} with {len(requests)} requests")
+        return batch
+
+    def retrieve(self, batch_id: str) -> Batch:
+        """
+        Fetch the current state of a batch.
+        """
+        return self.client.batches.retrieve(batch_id)
+
+    def cancel(self, batch_id: str) -> Optional[Batch]:
+        """
+        Cancel a batch, logging rather than raising if that fails.
+        """
+        try:
+            return self.client.batches.cancel(batch_id)
+        except Exception as e:
+            self.logger.error(f"Error cancelling batch {batch_id}: {e}")
+            return None
+
+    def collect(self, batch: Batch) -> Dict[str, Any]:
+        """
+        Parse the batch output file into responses keyed by custom_id.
+
+        Requests that failed to parse map to the exception raised for them.
+        """
+        responses: Dict[str, Any] = {}
+        if not batch.output_file_id:
+            return responses
 
-        self.logger.info(f"Completed analysis for file: {file_name}")
-        return response
+        output = self.client.files.content(batch.output_file_id)
+        for line in output.text.splitlines():
+            item = orjson.loads(line)
+            try:
+                content = item["response"]["body"]["choices"][0]["message"]["content"]
+                responses[item["custom_id"]] = LLMResponseSchema.model_validate_json(
+                    content
+                )
+            except Exception as e:
+                responses[item["custom_id"]] = e
+        return responses
@@ -1,48 +1,90 @@
 import re
+import orjson
 import logging
-from typing import List, Dict, Optional, Any
+from typing import Iterator, Dict, Optional, Any
+from redis import Redis
 from github import Github
 from github.PullRequest import PullRequest
 from github.Repository import Repository
+from app.config import settings
+
+_REPO_URL_RE = re.compile(r"https?://github\.com/([^/]+)/([^/]+)")
+
+# Largest page size GitHub allows for listing pull request files
+_PER_PAGE = 100
 
 
 class GitHubService:
     """Service for interacting with GitHub repositories and pull requests."""
 
-    def __init__(self, token: Optional[str] = None):
+    def __init__(self, token: Optional[str] = None, cache: Optional[Redis] = None):
         self.logger = logging.getLogger(__name__)
-        self.client = Github(token) if token else Github()
+        self.client = Github(token, per_page=_PER_PAGE)
+        self.cache = cache
 
     def _parse_repo_url(self, repo_url: str) -> tuple:
         """
         Parse GitHub repository URL into owner and repo name.
         """
-        match = re.match(r"https?://github.com/([^/]+)/([^/]+)", repo_url)
+        match = _REPO_URL_RE.match(repo_url)
         if not match:
             raise ValueError("Invalid GitHub repository URL")
         return match.groups()
 
-    def get_pr_files(self, repo_url: str, pr_number: int) -> List[Dict[str, Any]]:
+    def get_pull_request(self, repo_url: str, pr_number: int) -> PullRequest:
         """
-        Fetch files with changes from a specific pull request.
+        Fetch a specific pull request.
         """
         try:
-            self.logger.info(f"Fetching files from PR #{pr_number} in {repo_url}")
             owner, repo_name = self._parse_repo_url(repo_url)
-            repo = self.client.get_repo(f"{owner}/{repo_name}")
-            pr = repo.get_pull(pr_number)
+            # Lazy repo avoids a metadata request, only the pull itself is fetched
+            repo = self.client.get_repo(f"{owner}/{repo_name}", lazy=True)
+            return repo.get_pull(pr_number)
+
+        except Exception as e:
+            self.logger.error(f"Error fetching PR: {str(e)}")
+            raise
+
+    def iter_pr_files(self, pr: PullRequest) -> Iterator[Dict[str, Any]]:
+        """
+        Yield files with changes from a pull request as GitHub paginates them.
+        """
+        try:
+            self.logger.info(f"Fetching files from PR #{pr.number}")
+
+            # The file list is immutable for a given PR, base and head commit, so
+            # re-analysis of the same revision skips the paginated files endpoint
+            cache_key = (
+                f"gh:files:{pr.base.repo.full_name}:{pr.number}"
+                f":{pr.base.sha}:{pr.head.sha}"
+            )
+            if self.cache is not None:
+                cached = self.cache.get(cache_key)
+                if cached:
+                    files = orjson.loads(cached)
+                    self.logger.info(f"Loaded {len(files)} files from cache")
+                    yield from files
+                    return
 
             files = []
             for file in pr.get_files():
-                files.append(
-                    {
-                        "name": file.filename,
-                        "content": file.patch,
-                        "status": file.status,
-                    }
-                )
+                # Binary files and very large diffs come back without a patch
+                if file.patch is None:
+                    self.logger.info(f"Skipping file without patch: {file.filename}")
+                    continue
+                pr_file = {
+                    "name": file.filename,
+                    "content": file.patch,
+                    "status": file.status,
+                }
+                files.append(pr_file)
+                yield pr_file
             self.logger.info(f"Successfully fetched {len(files)} files from PR")
-            return files
+
+            if self.cache is not None:
+                self.cache.setex(
+                    cache_key, settings.GITHUB_CACHE_TTL, orjson.dumps(files)
+                )
 
         except Exception as e:
             self.logger.error(f"Error fetching PR files: {str(e)}")
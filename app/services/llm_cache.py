@@ -0,0 +1,53 @@
+import logging
+import hashlib
+import threading
+from typing import List, Optional, Union
+from redis import Redis
+from app.config import settings
+
+
+class LLMResultCache:
+    """Exact-match cache of LLM analysis results stored in Redis."""
+
+    KEY_PREFIX = "llm:v3:"
+
+    def __init__(self, client: Redis, ttl: Optional[int] = None):
+        self.logger = logging.getLogger(__name__)
+        self.client = client
+        self.ttl = ttl or settings.LLM_CACHE_TTL
+        # Counted across every task in the process, from executor threads
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def make_key(cls, *parts: str) -> str:
+        """
+        Build a cache key from everything that determines the LLM response.
+        """
+        return cls.KEY_PREFIX + hashlib.sha256("\0".join(parts).encode()).hexdigest()
+
+    def get_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        """
+        Fetch cached JSON results for the keys in one round-trip, None for misses.
+        """
+        if not keys:
+            return []
+
+        values = self.client.mget(keys)
+        hits = sum(value is not None for value in values)
+        with self._lock:
+            self.hits += hits
+            self.misses += len(values) - hits
+            total_hits, total_misses = self.hits, self.misses
+        self.logger.info(
+            f"LLM cache: {hits} hits, {len(values) - hits} misses "
+            f"({total_hits} hits, {total_misses} misses in this process)"
+        )
+        return values
+
+    def set(self, key: str, value: Union[str, bytes], ttl: Optional[int] = None):
+        """
+        Store a JSON result for the given key.
+        """
+        self.client.setex(key, ttl or self.ttl, value)
@@ -1,51 +1,159 @@
+import time
+import asyncio
+import functools
+from collections import Counter
+from celery.exceptions import Ignore
 from celery.utils.log import get_task_logger
+from openai.types import Batch
 from app.services.gh import GitHubService
-from app.services.analyzer import AICodeAnalysisService
+from app.services.analyzer import AICodeAnalysisService, BatchLLMProcessor
+from app.services.llm_cache import LLMResultCache
 from app.celery_conf import celery_app
+from app.schemas import IssueSeverityEnums
+from app.config import settings
+from app.redis_conf import redis_client
 
 logger = get_task_logger(__name__)
 
+# Shared by every task in the worker process so its hit/miss counters add up
+llm_cache = LLMResultCache(redis_client)
 
-@celery_app.task(name="analyze_code_task")
-def analyze_code_task(repo_url: str, pr_number: int, github_token: str | None = None):
+
+@functools.cache
+def _event_loop() -> asyncio.AbstractEventLoop:
+    """Event loop shared by every task in this worker process.
+
+    The LLM client's pooled connections belong to the loop they were opened on,
+    so one loop per process lets them be reused from one task to the next.
+    """
+    return asyncio.new_event_loop()
+
+
+def _batch_progress(batch: Batch, total: int) -> dict:
+    """Progress of a running Batch API job, as reported in the task's meta."""
+    counts = batch.request_counts
+    return {
+        "batch_id": batch.id,
+        "batch_status": batch.status,
+        "completed": counts.completed if counts else 0,
+        "total": counts.total if counts else total,
+    }
+
+
+@celery_app.task(bind=True, name="analyze_code_task")
+def analyze_code_task(
+    self,
+    repo_url: str,
+    pr_number: int,
+    github_token: str | None = None,
+    batch_state: dict | None = None,
+):
     """Analyze the code in a PR using AI agent."""
     logger.info(f"Analyzing code for PR #{pr_number} from {repo_url}")
     try:
         logger.info(f"Starting code analysis for PR #{pr_number}")
 
-        gh = GitHubService(github_token)
-        pr_files = gh.get_pr_files(repo_url, pr_number)
+        ai_analyser = AICodeAnalysisService(cache=llm_cache)
+        # Progress callbacks may run in executor threads, where the thread-local
+        # self.request has no id, so the task id is captured here
+        task_id = self.request.id
+
+        def poll_batch_later(batch: Batch, state: dict):
+            # Re-queue the task under the same id instead of sleeping, so a
+            # running batch does not hold a worker slot between polls
+            self.update_state(
+                task_id=task_id,
+                state="PROGRESS",
+                meta=_batch_progress(batch, state["files"]),
+            )
+            countdown = min(
+                settings.BATCH_API_POLL_INTERVAL * 2 ** state["polls"],
+                settings.BATCH_API_MAX_POLL_INTERVAL,
+            )
+            self.apply_async(
+                (repo_url, pr_number, github_token),
+                {"batch_state": {**state, "polls": state["polls"] + 1}},
+                task_id=task_id,
+                countdown=countdown,
+            )
+            raise Ignore()
+
+        batch = None
+        if batch_state is not None:
+            batch = ai_analyser.poll_batch(batch_state["id"])
+            if (
+                batch is not None
+                and batch.status not in BatchLLMProcessor.TERMINAL_STATUSES
+            ):
+                if time.time() < batch_state["deadline"]:
+                    poll_batch_later(batch, batch_state)
+                logger.warning(
+                    f"Batch {batch.id} not finished after "
+                    f"{settings.BATCH_API_MAX_WAIT}s, cancelling it"
+                )
+                batch = ai_analyser.cancel_batch(batch.id)
 
-        analysis_results = []
-        total_issues = 0
-        critical_issues = 0
+        gh = GitHubService(github_token, cache=redis_client)
+        pr = gh.get_pull_request(repo_url, pr_number)
+        pr_files = gh.iter_pr_files(pr)
 
-        ai_analyser = AICodeAnalysisService()
+        if pr.changed_files > settings.BATCH_API_MIN_FILES:
+            # Large PRs go through the Batch API at half the token cost
+            files = list(pr_files)
+            if batch_state is None:
+                batch = _event_loop().run_until_complete(
+                    ai_analyser.submit_batch(files)
+                )
+                if batch is not None:
+                    poll_batch_later(
+                        batch,
+                        {
+                            "id": batch.id,
+                            "deadline": time.time() + settings.BATCH_API_MAX_WAIT,
+                            "files": pr.changed_files,
+                            "polls": 0,
+                        },
+                    )
 
-        # Analyze each file
-        for pr_file in pr_files:
-            data = ai_analyser.analyze_file(
-                pr_file["content"], pr_file["name"], pr_file["status"]
+            analysis_results = _event_loop().run_until_complete(
+                ai_analyser.collect_batch(files, batch)
             )
-            analysis_results.append(data)
+        else:
+            # Analyze files concurrently while later pages are still being fetched
+            def report_files(done, total, last_file):
+                self.update_state(
+                    task_id=task_id,
+                    state="PROGRESS",
+                    meta={
+                        "done": done,
+                        "total": total,
+                        "last_file": last_file,
+                    },
+                )
 
-            # Update Summary
-            total_issues += len(data["issues"])
-            for issue in data["issues"]:
-                if issue["severity"] == "critical":
-                    critical_issues += 1
+            analysis_results = _event_loop().run_until_complete(
+                ai_analyser.analyze_files(pr_files, on_progress=report_files)
+            )
+
+        # Update Summary
+        severities = Counter(
+            issue.severity for data in analysis_results for issue in data.issues
+        )
 
         # Create final report
         logger.info(f"Code analysis completed for PR #{pr_number}")
         return {
-            "files": analysis_results,
+            "files": [data.model_dump(mode="json") for data in analysis_results],
             "summary": {
-                "total_files": len(pr_files),
-                "total_issues": total_issues,
-                "critical_issues": critical_issues,
+                "total_files": pr.changed_files,
+                "skipped_files": pr.changed_files - len(analysis_results),
+                "total_issues": severities.total(),
+                "critical_issues": severities[IssueSeverityEnums.critical],
             },
         }
 
+    except Ignore:
+        raise
     except Exception as e:
         logger.error(f"Error in code analysis: {str(e)}")
         raise